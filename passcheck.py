@@ -1,126 +1,235 @@
 import re
 import json
 import hashlib
+import functools
 import secrets
 import string
 import getpass
-import requests
-import time
+import contextlib
 import threading
+import time
+import atexit
 import sys
 from datetime import datetime
-from pyfiglet import figlet_format
 from colorama import Fore, Style, init
 import argparse
 import os
 
 init(autoreset=True)
 
-class LoadingSpinner:
-    def __init__(self, message="Processing"):
-        self.message = message
-        self.spinner_chars = ['-', '\\', '|', '/']
-        self.stop_spinner = False
-        self.spinner_thread = None
-        
-    def start(self):
-        self.stop_spinner = False
-        self.spinner_thread = threading.Thread(target=self._spin)
-        self.spinner_thread.start()
-        
-    def stop(self):
-        self.stop_spinner = True
-        if self.spinner_thread:
-            self.spinner_thread.join()
-        print('\r' + ' ' * (len(self.message) + 4), end='\r')
-        
-    def _spin(self):
-        idx = 0
-        while not self.stop_spinner:
-            char = self.spinner_chars[idx % len(self.spinner_chars)]
-            print(f'\r{char} {self.message}...', end='', flush=True)
-            time.sleep(0.15)
-            idx += 1
+# Character classes scored by check_password_strength
+_LOWER_CHARS = frozenset(string.ascii_lowercase)
+_UPPER_CHARS = frozenset(string.ascii_uppercase)
+_DIGIT_CHARS = frozenset(string.digits)
+_SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+# Year pattern, compiled once at import
+_DATE = re.compile(r'(19|20)\d{2}')
+
+# SHA-1 hex digest accepted by check_breach_status
+_SHA1_HEX = re.compile(r'[0-9A-Fa-f]{40}')
+
+# Rendered once with figlet_format("PassCheck", font="slant")
+_BANNER = "\n".join([
+    r"    ____                  ________              __",
+    r"   / __ \____ ___________/ ____/ /_  ___  _____/ /__",
+    r"  / /_/ / __ `/ ___/ ___/ /   / __ \/ _ \/ ___/ //_/",
+    r" / ____/ /_/ (__  |__  ) /___/ / / /  __/ /__/ ,<",
+    r"/_/    \__,_/____/____/\____/_/ /_/\___/\___/_/|_|",
+]) + "\n\n"
+
+# Alphabets for generated passwords, with and without ambiguous characters
+_BASE_FULL = string.ascii_letters + string.digits + "!@#$%^&*"
+_BASE_SAFE = ''.join(c for c in _BASE_FULL if c not in '0OlI1')
+_DIGITS_SAFE = string.digits.replace('0', '')
+
+def _random_chars(alphabet, count):
+    # Uniform picks from alphabet using bulk OS randomness. Bytes at or above
+    # the largest multiple of len(alphabet) are rejected to avoid modulo bias.
+    n = len(alphabet)
+    limit = 256 // n * n
+    chars = []
+    while len(chars) < count:
+        for b in secrets.token_bytes(count * 2):
+            if b < limit:
+                chars.append(alphabet[b % n])
+                if len(chars) == count:
+                    break
+    return chars
+
+# Shared HTTP session so repeat breach checks reuse the HTTPS connection.
+# Created on first use to keep requests off the --generate startup path.
+_session = None
+
+def _get_session():
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        session.mount("https://api.pwnedpasswords.com/", HTTPAdapter(
+            pool_connections=1, pool_maxsize=4,
+            max_retries=Retry(total=2, connect=0, read=0, backoff_factor=0.5,
+                              status_forcelist=(429, 503),
+                              respect_retry_after_header=False)))
+        _session = session
+    return _session
+
+# History lines are written with compact separators (no spaces after , and :).
+# Kept as one encoder since json.dumps(separators=...) builds a new one per call.
+_encode_entry = json.JSONEncoder(separators=(',', ':')).encode
+
+def _sha1_hex(password):
+    return hashlib.sha1(password.encode()).hexdigest().upper()
+
+@functools.lru_cache(maxsize=1024)
+def _breach_lookup(sha1_hash):
+    # Keyed on the SHA-1 digest so plaintext passwords never enter the cache.
+    # Failed lookups raise instead of returning, so they are not cached.
+    import requests
+
+    prefix = sha1_hash[:5]
+    suffix = sha1_hash[5:].encode()
+
+    # Query HaveIBeenPwned API
+    url = f"https://api.pwnedpasswords.com/range/{prefix}"
+    headers = {'User-Agent': 'PassCheck-Security-Tool'}
+
+    # Stream the body so parsing stops at the matching line. Lines are
+    # compared as bytes since the response does not always declare a charset.
+    with _get_session().get(url, headers=headers, timeout=10, stream=True) as response:
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Unexpected status {response.status_code}", response=response)
+
+        lines = response.iter_lines()
+        for line in lines:
+            hash_suffix, _, count = line.partition(b':')
+            if hash_suffix == suffix:
+                # Drain the rest so the connection goes back to the pool
+                for _ in lines:
+                    pass
+                return True, int(count)
+        return False, 0
+
+@contextlib.contextmanager
+def progress(message):
+    # Prints "message... done" around a block of work, without a thread
+    print(f"{message}...", end='', flush=True)
+    try:
+        yield
+    except BaseException:
+        print()
+        raise
+    print(" done")
 
 class PassCheck:
     def __init__(self):
         self.history = []
-        self.history_file = 'passcheck_history.json'
+        self.history_file = 'passcheck_history.jsonl'
+        self._history_lines = 0
+        self._unsaved = 0
         self.load_history()
+        atexit.register(self.flush_history)
+
+    @staticmethod
+    def generate_secure_password(length=16, exclude_ambiguous=False):
+        if not exclude_ambiguous and length >= 8:
+            return PassCheck._generate_default(length)
 
-    def generate_secure_password(self, length=16, exclude_ambiguous=False):
-        base_chars = string.ascii_letters + string.digits + "!@#$%^&*"
-        
         if exclude_ambiguous:
-            for char in '0OlI1':
-                base_chars = base_chars.replace(char, '')
+            base_chars, digits = _BASE_SAFE, _DIGITS_SAFE
+        else:
+            base_chars, digits = _BASE_FULL, string.digits
         
         # Ensure at least one character from each required type
         password = [
             secrets.choice(string.ascii_lowercase),
             secrets.choice(string.ascii_uppercase),
-            secrets.choice(string.digits.replace('0', '') if exclude_ambiguous else string.digits),
+            secrets.choice(digits),
             secrets.choice("!@#$%^&*")
         ]
         
         # Fill remaining length with random characters
-        for _ in range(length - 4):
-            password.append(secrets.choice(base_chars))
+        password.extend(_random_chars(base_chars, length - 4))
         
         # Shuffle the password
         secrets.SystemRandom().shuffle(password)
         return ''.join(password)
 
+    @staticmethod
+    def _generate_default(length):
+        # generate_secure_password() specialised for exclude_ambiguous=False.
+        # Draws the whole password in bulk and redraws until every required
+        # character type is present, instead of per-character picks plus a
+        # shuffle, which each read the OS RNG once per character. Only used
+        # from length 8 up: even there, at ~2.6 expected draws, it is faster.
+        while True:
+            password = ''.join(_random_chars(_BASE_FULL, length))
+            if not (_LOWER_CHARS.isdisjoint(password) or
+                    _UPPER_CHARS.isdisjoint(password) or
+                    _DIGIT_CHARS.isdisjoint(password) or
+                    _SPECIAL_CHARS.isdisjoint(password)):
+                return password
+
     def check_password_strength(self, password):
+        length = len(password)
+
+        # Fatally short - skip the remaining checks entirely
+        if length < 4:
+            return 0, [], ["Too short - use at least 8 characters"]
+
         score = 0
         feedback = []
         warnings = []
 
         # Length scoring
-        if len(password) >= 16:
+        if length >= 16:
             score += 35
             feedback.append("Excellent length (16+ characters)")
-        elif len(password) >= 12:
+        elif length >= 12:
             score += 25
             feedback.append("Good length (12-15 characters)")
-        elif len(password) >= 8:
+        elif length >= 8:
             score += 15
             feedback.append("Minimum acceptable length")
         else:
             warnings.append("Too short - use at least 8 characters")
 
-        # Character type checks
-        if re.search(r'[a-z]', password):
+        # Character type checks (isdisjoint stops at the first match)
+        if not _LOWER_CHARS.isdisjoint(password):
             score += 10
             feedback.append("Contains lowercase letters")
         else:
             warnings.append("Add lowercase letters")
 
-        if re.search(r'[A-Z]', password):
+        if not _UPPER_CHARS.isdisjoint(password):
             score += 10
             feedback.append("Contains uppercase letters")
         else:
             warnings.append("Add uppercase letters")
 
-        if re.search(r'\d', password):
+        if not _DIGIT_CHARS.isdisjoint(password):
             score += 10
             feedback.append("Contains numbers")
         else:
             warnings.append("Add numbers")
 
-        if re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+        if not _SPECIAL_CHARS.isdisjoint(password):
             score += 15
             feedback.append("Contains special characters")
         else:
             warnings.append("Add special characters")
 
         # Character diversity (only for passwords 8+ characters)
-        if len(password) >= 8:
-            unique_ratio = len(set(password)) / len(password)
-            if unique_ratio > 0.8:
+        if length >= 8:
+            # Compare unique/length against 0.8 and 0.6 without dividing
+            unique = len(set(password))
+            if unique * 5 > length * 4:
                 score += 15
                 feedback.append("Excellent character diversity")
-            elif unique_ratio > 0.6:
+            elif unique * 5 > length * 3:
                 score += 10
                 feedback.append("Good character diversity")
             else:
@@ -130,38 +239,30 @@ class PassCheck:
             warnings.append("Password too short for proper diversity")
 
         # Pattern penalties
-        if re.search(r'(123|abc|qwe|asd|zxc|password|admin)', password.lower()):
+        pw_lower = password.lower()
+        if ('123' in pw_lower or 'abc' in pw_lower or 'qwe' in pw_lower or
+                'asd' in pw_lower or 'zxc' in pw_lower or
+                'password' in pw_lower or 'admin' in pw_lower):
             score -= 15
             warnings.append("Contains common patterns or words")
 
-        if re.search(r'(19|20)\d{2}', password):
+        if ('19' in password or '20' in password) and _DATE.search(password):
             score -= 10
             warnings.append("Avoid using dates")
 
         return max(0, min(100, score)), feedback, warnings
 
-    def check_breach_status(self, password):
+    def check_breach_status(self, sha1_hash):
+        # Takes the SHA-1 hex digest from _sha1_hex(), not the password.
+        # Anything else is rejected before part of it can reach the API.
+        if not _SHA1_HEX.fullmatch(sha1_hash):
+            raise ValueError("check_breach_status expects a 40-character SHA-1 hex digest")
+        sha1_hash = sha1_hash.upper()
+
+        import requests
+
         try:
-            # Create SHA1 hash
-            sha1_hash = hashlib.sha1(password.encode()).hexdigest().upper()
-            prefix = sha1_hash[:5]
-            suffix = sha1_hash[5:]
-            
-            # Query HaveIBeenPwned API
-            url = f"https://api.pwnedpasswords.com/range/{prefix}"
-            headers = {'User-Agent': 'PassCheck-Security-Tool'}
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                for line in response.text.splitlines():
-                    hash_suffix, count = line.split(':')
-                    if hash_suffix == suffix:
-                        return True, int(count)
-                return False, 0
-            else:
-                return None, 0
-                
+            return _breach_lookup(sha1_hash)
         except requests.RequestException:
             return None, 0
 
@@ -178,23 +279,67 @@ class PassCheck:
             return "VERY WEAK", Fore.RED
 
     def save_history(self):
+        # Rewrite the log so it holds only the retained entries
         try:
+            lines = ''.join([_encode_entry(entry) + '\n' for entry in self.history])
             with open(self.history_file, 'w') as f:
-                json.dump(self.history, f, indent=2)
+                f.write(lines)
+            self._history_lines = len(self.history)
+            self._unsaved = 0
         except Exception:
             pass
 
     def load_history(self):
         try:
             if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    self.history = json.load(f)
+                entries = []
+                damaged = False
+                line = ''
+                with open(self.history_file, 'r', errors='replace') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        # Skip torn or corrupt lines (e.g. from a killed append)
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            entry = None
+                        if isinstance(entry, dict):
+                            entries.append(entry)
+                        else:
+                            damaged = True
+                # A missing final newline would glue the next append onto
+                # the last record, so treat it as damage too
+                if line and not line.endswith('\n'):
+                    damaged = True
+                self.history = entries[-50:]
+                self._history_lines = len(entries)
+                if damaged:
+                    # Force the next flush to rewrite a clean file
+                    self._history_lines = 101
         except Exception:
             self.history = []
 
+    def flush_history(self):
+        # Append unsaved entries; compact once the log would pass 100 lines
+        if not self._unsaved:
+            return
+        if self._history_lines + self._unsaved > 100:
+            self.save_history()
+            return
+        try:
+            lines = ''.join([_encode_entry(entry) + '\n'
+                             for entry in self.history[-self._unsaved:]])
+            with open(self.history_file, 'a') as f:
+                f.write(lines)
+            self._history_lines += self._unsaved
+            self._unsaved = 0
+        except Exception:
+            pass
+
     def add_to_history(self, score, rating, breach_status):
         entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
             'score': score,
             'rating': rating,
             'breach_status': breach_status
@@ -202,7 +347,11 @@ class PassCheck:
         self.history.append(entry)
         if len(self.history) > 50:
             self.history = self.history[-50:]
-        self.save_history()
+
+        # Written in batches of 5; the rest is flushed at exit
+        self._unsaved = min(self._unsaved + 1, len(self.history))
+        if self._unsaved >= 5:
+            self.flush_history()
 
     def show_history(self):
         if not self.history:
@@ -221,7 +370,7 @@ class PassCheck:
                   f"{entry['breach_status']}")
 
     def show_banner(self):
-        print(Fore.CYAN + figlet_format("PassCheck", font="slant") + Style.RESET_ALL)
+        print(Fore.CYAN + _BANNER + Style.RESET_ALL)
         print(f"{Fore.YELLOW}Professional Security Assessment | Built by Paul{Style.RESET_ALL}")
         print("-" * 50)
 
@@ -234,22 +383,22 @@ class PassCheck:
             print(f"{Fore.RED}No password entered.{Style.RESET_ALL}")
             return
 
-        # Step 1: Analyze strength
-        spinner = LoadingSpinner("Analyzing password strength")
-        spinner.start()
-        time.sleep(1)
-        score, feedback, warnings = self.check_password_strength(password)
+        # Analyze strength while the breach lookup waits on the network
+        # Only the breach lookup runs in the background; the strength check
+        # takes microseconds. A daemon thread is used rather than an executor
+        # because executor workers are joined at interpreter exit, so Ctrl-C
+        # would still wait for the network call to finish.
+        sha1_hash = _sha1_hex(password)
+        with progress("Analyzing password and checking breach databases"):
+            breach_result = []
+            breach_thread = threading.Thread(
+                target=lambda: breach_result.append(self.check_breach_status(sha1_hash)),
+                daemon=True)
+            breach_thread.start()
+            score, feedback, warnings = self.check_password_strength(password)
+            breach_thread.join()
+            breach_status, breach_count = breach_result[0] if breach_result else (None, 0)
         rating, rating_color = self.get_strength_rating(score)
-        spinner.stop()
-        print("Password strength analysis complete")
-
-        # Step 2: Check breach status
-        spinner = LoadingSpinner("Checking breach databases")
-        spinner.start()
-        time.sleep(1)
-        breach_status, breach_count = self.check_breach_status(password)
-        spinner.stop()
-        print("Breach database check complete")
 
         # Display results
         print(f"\n{'-' * 50}")
@@ -314,13 +463,9 @@ class PassCheck:
         exclude_ambiguous = False
 
         # Generate password
-        spinner = LoadingSpinner("Generating secure password")
-        spinner.start()
-        time.sleep(0.5)
-        password = self.generate_secure_password(length, exclude_ambiguous)
-        spinner.stop()
+        with progress("Generating secure password"):
+            password = self.generate_secure_password(length, exclude_ambiguous)
         
-        print("Password generated successfully")
         print(f"\nGenerated Password: {Fore.YELLOW}{password}{Style.RESET_ALL}")
         
         # Quick strength check
@@ -365,8 +510,8 @@ def main():
     
     # Command line password generation
     if args.generate:
-        checker = PassCheck()
-        password = checker.generate_secure_password(args.generate, args.no_ambiguous)
+        # Static method, so no history is loaded for a one-shot generation
+        password = PassCheck.generate_secure_password(args.generate, args.no_ambiguous)
         print(f"Generated password: {password}")
         return
     